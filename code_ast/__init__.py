@@ -1,4 +1,5 @@
 
+import re
 import logging as logger
 
 from .config import ParserConfig
@@ -7,12 +8,14 @@ from .ast import SourceCodeAST
 
 from .parsers import (
     ASTParser,
+    parse_many,
     match_span
 )
 
 from .visitor import (
     ASTVisitor, 
-    VisitorComposition
+    VisitorComposition,
+    ERROR_KIND_ID
 )
 
 from .transformer import (
@@ -31,8 +34,8 @@ def ast(source_code, lang = "guess", **kwargs):
 
     Parameters
     ----------
-    source_code : str
-        Source code to parsed as a string. Also
+    source_code : str or bytes
+        Source code to parsed as a string (or UTF-8 encoded bytes). Also
         supports parsing of incomplete source code
         snippets (by deactivating the syntax checker; see syntax_error)
     
@@ -40,7 +43,8 @@ def ast(source_code, lang = "guess", **kwargs):
         String identifier of the programming language
         to be parsed. Supported are most programming languages
         including python, java and javascript (see README)
-        Default: guess (Guesses language / Not supported currently throws error currently)
+        Default: guess (Guesses the language from the first lines of code;
+        throws an error if the language cannot be guessed)
     
     syntax_error : [raise, warn, ignore]
         Reaction to syntax error in code snippet.
@@ -56,7 +60,7 @@ def ast(source_code, lang = "guess", **kwargs):
     
     """
 
-    if len(source_code.strip()) == 0: raise ValueError("The code string is empty. Cannot tokenize anything empty: %s" % source_code) 
+    _check_not_empty(source_code)
 
     # If lang == guess, automatically determine the language
     if lang == "guess": lang = _lang_detect(source_code)
@@ -76,15 +80,130 @@ def ast(source_code, lang = "guess", **kwargs):
     return SourceCodeAST(config, tree, code)
 
 
+def ast_many(snippets, lang, workers = 1, **kwargs):
+    """
+    Parses the ASTs of many code snippets written in the same programming language.
+
+    In contrast to calling ast for each snippet, the parser configuration
+    and the parser are only setup once (see parse_many).
+
+    Parameters
+    ----------
+    snippets : iterable of str or bytes
+        Source code snippets to be parsed (see ast)
+    
+    lang : [python, java, javascript, ...]
+        String identifier of the programming language
+        to be parsed (see ast). Guessing is not supported.
+
+    workers : int
+        Number of threads used for parsing. Threads only help
+        if tree-sitter releases the GIL while parsing (see parse_many).
+        Default: 1
+
+    syntax_error : [raise, warn, ignore]
+        Reaction to syntax error in code snippet (see ast).
+        Default: raise
+
+    Returns
+    -------
+    iterator of SourceCodeAST
+        ASTs of the snippets (in the order of the given snippets)
+    
+    """
+
+    if lang == "guess":
+        raise ValueError("ast_many cannot guess the language of snippets. Please specify a language with the lang keyword\n code_ast.ast_many(snippets, lang = your_lang)")
+
+    config = ParserConfig(lang, **kwargs)
+
+    return _ast_many(config, snippets, workers)
+
+
+def _ast_many(config, snippets, workers):
+
+    def check_snippets():
+        for source_code in snippets:
+            _check_not_empty(source_code)
+            yield source_code
+
+    for tree, code in parse_many(config.lang, check_snippets(), workers = workers):
+
+        # Check for errors if necessary
+        check_tree_for_errors(tree, mode = config.syntax_error)
+
+        yield SourceCodeAST(config, tree, code)
+
+
+def _check_not_empty(source_code):
+    if not source_code or source_code.isspace(): raise ValueError("The code string is empty. Cannot tokenize anything empty: %s" % source_code) 
+
+
 # Lang detect --------------------------------------  
 
 
+# Signatures identifying a language at the start of a line (regular expressions)
+_LANG_SIGNATURES = (
+    (rb"\n#!/usr/bin/env python", "python"),
+    (rb"\n#!/usr/bin/python", "python"),
+    (rb"\n#!/usr/bin/env node", "javascript"),
+    (rb"\n#!/usr/bin/env ruby", "ruby"),
+    (rb"\n#!/usr/bin/env bash", "bash"),
+    (rb"\n#!/bin/bash", "bash"),
+    (rb"\n#!/bin/sh", "bash"),
+    (rb"\n<\?php", "php"),
+    (rb"\npackage main\b", "go"),
+    (rb"\npackage [\w.]+\s*;", "java"), # Java package declarations end with ;
+    (rb"\nimport java\.", "java"),
+    (rb"\npublic class ", "java"),
+    (rb"\nuse std::", "rust"),
+    (rb"\n#include <iostream>", "cpp"),
+    (rb"\n#include <stdio.h>", "c"),
+)
+
+# Keywords shared by several languages (only used if no signature is found)
+_LANG_KEYWORDS = (
+    (rb"\nfunc ", "go"),
+    (rb"\npackage \w+[ \t]*(?:\n|$)", "go"), # Go package declarations have no ;
+    (rb"\nfn ", "rust"),
+    (rb"\nfunction ", "javascript"),
+    (rb"\ndef ", "python"),
+    (rb"\nfrom ", "python"),
+)
+
+_LANG_SIGNATURES = tuple((re.compile(pattern), lang) for pattern, lang in _LANG_SIGNATURES)
+_LANG_KEYWORDS   = tuple((re.compile(pattern), lang) for pattern, lang in _LANG_KEYWORDS)
+
+
 def _lang_detect(source_code):
-    """Guesses the source code type using pygments"""
-    raise NotImplementedError(
-        "Guessing the language automatically is currently not implemented. Please specify a language with the lang keyword\n code_tokenize.tokenize(code, lang = your_lang)"
+    """Guesses the source code type from the first lines of code"""
+
+    if isinstance(source_code, str):
+        source_code = source_code[:256].encode("utf-8")
+
+    # Signatures are matched at the start of (unindented) lines
+    head = b"\n" + b"\n".join(line.lstrip() for line in source_code[:256].split(b"\n"))
+
+    for signatures in (_LANG_SIGNATURES, _LANG_KEYWORDS):
+        lang = _find_first_signature(head, signatures)
+        if lang is not None: return lang
+
+    raise ValueError(
+        "Cannot guess the language of the given code. Please specify a language with the lang keyword\n code_ast.ast(code, lang = your_lang)"
     )
 
+
+def _find_first_signature(head, signatures):
+    """Returns the language of the signature that occurs first in head"""
+    first_position, first_lang = len(head), None
+
+    for signature, lang in signatures:
+        match = signature.search(head)
+        if match is not None and match.start() < first_position:
+            first_position, first_lang = match.start(), lang
+
+    return first_lang
+
 # Detect error --------------------------------
 
 class ErrorVisitor(ASTVisitor):
@@ -102,9 +221,34 @@ class ErrorVisitor(ASTVisitor):
             warn_syntax_error(node)
             return
 
+    def walk(self, root_node, language = None):
+        if root_node is None: return
+
+        # Only descend into subtrees that are flagged to contain an error
+        cursor   = root_node.walk()
+        has_next = True
+
+        while has_next:
+            current_node = cursor.node
+
+            if current_node.kind_id == ERROR_KIND_ID:
+                self.visit_ERROR(current_node)
+
+            # Step 1: Try to go to next child if the subtree contains an error
+            if current_node.has_error and cursor.goto_first_child():
+                continue
+
+            # Step 2: Try to go to next sibling
+            has_next = cursor.goto_next_sibling()
+
+            # Step 3: Go up until sibling exists
+            while not has_next and cursor.goto_parent():
+                has_next = cursor.goto_next_sibling()
+
 
 def check_tree_for_errors(tree, mode = "raise"):
     if mode == "ignore": return
+    if not tree.root_node.has_error: return
 
     # Check for errors
     ErrorVisitor(mode)(tree)
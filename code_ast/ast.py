@@ -1,16 +1,32 @@
-from .parsers import match_span
+from .parsers import match_span, _LazyLines, load_language
+from .visitor import ASTVisitor
+
+# Sources larger than this are not rendered in repr (see SourceCodeAST.pretty)
+REPR_MAX_BYTES = 100000
 
 class SourceCodeAST:
 
     def __init__(self, config, source_tree, source_lines):
         self.config = config
         self.source_tree = source_tree
-        self.source_lines = source_lines
+        self.source_lines = _LazyLines.from_lines(source_lines)
+
+        self._code       = None
+        self._repr_cache = None # ((root node id, indent), AST string)
+
+    @property
+    def source_bytes(self):
+        return self.source_lines.source_bytes
 
     def root_node(self):
         return self.source_tree.root_node
 
     def match(self, source_node):
+        source_text = source_node.text
+        
+        if source_text is not None:
+            return source_text.decode("utf-8")
+        
         return match_span(source_node, self.source_lines)
 
     # Visit tree ----------------------------------------------------------------
@@ -23,57 +39,86 @@ class SourceCodeAST:
             # Is not a transformer
             pass
 
-        visitor(self.source_tree)
+        # The language is only passed to visitors that use the default entry point
+        if type(visitor).__call__ is ASTVisitor.__call__:
+            visitor(self.source_tree, language = load_language(self.config.lang))
+        else:
+            visitor(self.source_tree)
 
     # Repr ----------------------------------------------------------------
 
     def code(self):
-        return "\n".join(self.source_lines)
+        if self._code is None:
+            self._code = self.source_bytes.decode("utf-8")
+        return self._code
+
+    def pretty(self, indent = 1):
+        """Readable representation of the complete AST (one node per line)"""
+        root_id = self.source_tree.root_node.id
+        if self._repr_cache is None or self._repr_cache[0] != (root_id, indent):
+            self._repr_cache = ((root_id, indent), ast_to_str(self.source_tree, indent = indent))
+
+        return self._repr_cache[1]
 
     def __repr__(self):
 
         lang = self.config.lang
         lang_name = "".join((lang_part[0].upper() + lang_part[1:] for lang_part in lang.split("-")))
 
-        ast_repr = ast_to_str(self.source_tree, indent = 1)
+        end_line, end_char = self.source_tree.root_node.end_point
+        header = f"{lang_name}CodeAST [0, 0] - [{end_line}, {end_char}]"
 
-        return f"{lang_name}CodeAST [0, 0] - [{len(self.source_lines)}, {len(self.source_lines[-1])}]\n{ast_repr}"
+        if len(self.source_bytes) > REPR_MAX_BYTES:
+            return f"{header}\n    <truncated>"
+
+        return f"{header}\n{self.pretty(indent = 1)}"
 
 
 # AST to readable ----------------------------------------------------------------
 
 LEAVE_WHITELIST = {"identifier", "integer", "float"}
 
-def _serialize_node(node):
-    return f"{node.type} [{node.start_point[0]}, {node.start_point[1]}] - [{node.end_point[0]}, {node.end_point[1]}]"
+_INDENT_CACHE = [""]
+
+def _indent(n):
+    while len(_INDENT_CACHE) <= n:
+        _INDENT_CACHE.append(_INDENT_CACHE[-1] + "    ")
+    return _INDENT_CACHE[n]
+
+def _serialize_node(node, _fmt = "%s [%d, %d] - [%d, %d]".__mod__):
+    start_point, end_point = node.start_point, node.end_point
+    return _fmt((node.type, start_point[0], start_point[1], end_point[0], end_point[1]))
 
 def ast_to_str(tree, indent = 0):
     ast_lines = []
+    append    = ast_lines.append
     root_node = tree.root_node
     cursor    = root_node.walk()
 
+    # Bind cursor moves once (the loop runs once per AST node)
+    goto_first_child  = cursor.goto_first_child
+    goto_next_sibling = cursor.goto_next_sibling
+    goto_parent       = cursor.goto_parent
+
     has_next = True
 
     while has_next:
         current_node = cursor.node
 
         if current_node.child_count > 0 or current_node.type in LEAVE_WHITELIST:
-            ast_lines.append("    "*indent + _serialize_node(current_node))
+            append(_indent(indent) + _serialize_node(current_node))
 
         # Step 1: Try to go to next child if we continue the subtree
-        if cursor.goto_first_child():
+        if goto_first_child():
             indent += 1
-            has_next = True
-        else:
-            has_next = False
+            continue
 
         # Step 2: Try to go to next sibling
-        if not has_next:
-            has_next = cursor.goto_next_sibling()
+        has_next = goto_next_sibling()
 
         # Step 3: Go up until sibling exists
-        while not has_next and cursor.goto_parent():
+        while not has_next and goto_parent():
             indent -= 1
-            has_next = cursor.goto_next_sibling()
+            has_next = goto_next_sibling()
 
-    return "\n".join(ast_lines)
\ No newline at end of file
+    return "\n".join(ast_lines)
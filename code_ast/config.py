@@ -2,6 +2,11 @@
 class ParserConfig:
     """Helper object to translate arguments of ast to config object"""
 
+    __slots__ = ("lang", "syntax_error", "statement_types")
+
+    # Options that can be set via keyword arguments
+    _ALLOWED = frozenset(__slots__)
+
     def __init__(self, lang, **kwargs):
         self.lang = lang
         self.syntax_error = "raise" # Options: raise, warn, ignore
@@ -13,21 +18,23 @@ class ParserConfig:
 
         self.update(kwargs)
 
-    
+
     def update(self, kwargs):
+        allowed = self._ALLOWED
         for k, v in kwargs.items():
 
-            if k not in self.__dict__:
+            if k not in allowed:
                 raise TypeError("TypeError: tokenize() got an unexpected keyword argument '%s'" % k)
-        
-            self.__dict__[k] = v
-    
+
+            setattr(self, k, v)
+
     def __repr__(self):
 
         elements = []
-        for k, v in self.__dict__.items():
+        for k in self.__slots__:
+            v = getattr(self, k)
             if v is not None:
                 elements.append("%s=%s" % (k, v))
-        
+
         return "Config(%s)" % ", ".join(elements)
 
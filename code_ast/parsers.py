@@ -7,27 +7,30 @@ Main features:
 
 """
 import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from array import array
+from functools import lru_cache
 from tree_sitter import Language, Parser
 
 import logging as logger
 
-# For autoloading
-import requests
-from git import Repo
-
 try:
-    from tree_sitter_languages import get_language, get_parser
+    from tree_sitter_languages import get_language
 except ImportError:
-    get_language, get_parser = None, None
+    get_language = None
 
 
 # Automatic loading of Tree-Sitter parsers --------------------------------
 
+@lru_cache(maxsize = None)
 def load_language(lang):
     """
     Loads a language specification object necessary for tree-sitter.
 
     Language specifications are loaded from remote or a local cache.
+    Loaded languages are memoized per language identifier.
     If language specification is not contained in cache, the function
     clones the respective git project and then builds the language specification
     via tree-sitter.
@@ -72,6 +75,30 @@ def load_language(lang):
     _clone_parse_def_from_github(lang, source_lang_path)
     return load_language(lang)
 
+
+def _create_parser(lang):
+    # Parsers are cheap to create (the language is memoized by load_language)
+    parser = Parser()
+    parser.set_language(load_language(lang))
+    return parser
+
+
+# Parsers cannot be used concurrently. Therefore, each worker thread
+# of parse_many gets its own parsers
+_PARSER_CACHE = threading.local()
+
+def _get_parser_cached(lang):
+    try:
+        parsers = _PARSER_CACHE.parsers
+    except AttributeError:
+        parsers = _PARSER_CACHE.parsers = {}
+
+    try:
+        return parsers[lang]
+    except KeyError:
+        parser = parsers[lang] = ASTParser(lang)
+        return parser
+
 # Parser ---------------------------------------------------------------
 
 class ASTParser:
@@ -97,12 +124,7 @@ class ASTParser:
 
         self.lang_id = lang
         self.lang    = load_language(lang)
-
-        if get_parser is not None:
-            self.parser = get_parser(self.lang_id)
-        else:
-            self.parser  = Parser()
-            self.parser.set_language(self.lang)
+        self.parser  = _create_parser(lang)
 
     def parse_bytes(self, data):
         """
@@ -126,8 +148,8 @@ class ASTParser:
 
         Parameters
         ----------
-        source_code : str
-            Source code as a string
+        source_code : str or bytes
+            Source code as a string or as UTF-8 encoded bytes
 
         Returns
         -------
@@ -135,13 +157,131 @@ class ASTParser:
             tree-sitter object representing the syntax tree
 
         source_lines
-            a list of code lines for reference
+            a list-like view of the code lines for reference
+            (lines are only split on first access)
 
         """
-        source_lines = source_code.splitlines()
-        source_bytes = source_code.encode("utf-8")
+        if isinstance(source_code, str):
+            source_bytes = source_code.encode("utf-8")
+        else:
+            source_bytes = source_code
+
+        return self.parse_bytes(source_bytes), _LazyLines(source_bytes)
+
 
-        return self.parse_bytes(source_bytes), source_lines
+class _LazyLines:
+    """
+    List-like view on the lines of an UTF-8 encoded source code
+
+    The source code is only decoded and split into lines
+    when the lines are accessed for the first time.
+    """
+
+    def __init__(self, source_bytes):
+        self.source_bytes  = source_bytes
+        self._lines        = None
+        self._line_offsets = None
+
+    @classmethod
+    def from_lines(cls, source_lines):
+        if isinstance(source_lines, cls): return source_lines
+        return cls("\n".join(source_lines).encode("utf-8"))
+
+    def lines(self):
+        if self._lines is None:
+            # Tree-sitter only breaks lines at \n (optionally preceded by \r)
+            lines = self.source_bytes.decode("utf-8").split("\n")
+            if b"\r" in self.source_bytes:
+                lines = [line[:-1] if line.endswith("\r") else line for line in lines]
+            self._lines = lines
+        return self._lines
+
+    def line_offsets(self):
+        """Byte offsets of all line starts (computed once)"""
+        if self._line_offsets is None:
+            find    = self.source_bytes.find
+            offsets = array("Q", [0])
+
+            position = find(b"\n")
+            while position != -1:
+                offsets.append(position + 1)
+                position = find(b"\n", position + 1)
+
+            self._line_offsets = offsets
+        return self._line_offsets
+
+    def span(self, start_point, end_point):
+        """Decodes the source text inbetween two tree-sitter points"""
+        line_offsets = self.line_offsets()
+        start = line_offsets[start_point[0]] + start_point[1]
+        end   = line_offsets[end_point[0]] + end_point[1]
+        return self.source_bytes[start:end].decode("utf-8")
+
+    def __getitem__(self, index):
+        return self.lines()[index]
+
+    def __len__(self):
+        return len(self.lines())
+
+    def __iter__(self):
+        return iter(self.lines())
+
+    def __repr__(self):
+        return repr(self.lines())
+
+
+def parse_many(lang, source_codes, workers = 1):
+    """
+    Parses many source codes of the same language
+
+    With more than one worker, source codes are parsed by a pool
+    of threads where each thread uses its own tree-sitter parser.
+    Threads only speed up parsing if the installed tree-sitter
+    binding releases the GIL while parsing (tree_sitter 0.21 does not).
+    Otherwise, the thread pool only adds overhead.
+
+    Parameters
+    ----------
+    lang : [python, java, javascript, ...]
+        Language identifier specific to tree-sitter.
+        Same as for load_language
+
+    source_codes : iterable of str or bytes
+        Source codes to be parsed (consumed lazily)
+    
+    workers : int
+        Number of threads used for parsing.
+        Default: 1 (parses in the calling thread)
+
+    Returns
+    -------
+    iterator of (tree-sitter syntax tree, source_lines)
+        Results of ASTParser.parse in the order of the given source codes
+
+    """
+
+    # Load (and potentially compile) the language once before starting any worker
+    load_language(lang)
+
+    def parse(source_code):
+        # Parsers are cached per thread
+        return _get_parser_cached(lang).parse(source_code)
+
+    if workers <= 1:
+        yield from map(parse, source_codes)
+        return
+
+    with ThreadPoolExecutor(max_workers = workers) as executor:
+        # Only a bounded number of source codes is submitted ahead of the results
+        pending = deque()
+
+        for source_code in source_codes:
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+            pending.append(executor.submit(parse, source_code))
+
+        while pending:
+            yield pending.popleft().result()
 
 
 # Utils ------------------------------------------------
@@ -157,6 +297,7 @@ def match_span(source_tree, source_lines):
     
     source_lines : list[str]
         Source code as a list of source lines
+        (or the lines view returned by ASTParser.parse)
 
     Returns
     -------
@@ -164,21 +305,22 @@ def match_span(source_tree, source_lines):
         the source code that is represented by the given source tree
     
     """
-    
+    if isinstance(source_lines, _LazyLines):
+        return source_lines.span(source_tree.start_point, source_tree.end_point)
+
     start_line, start_char = source_tree.start_point
     end_line,   end_char   = source_tree.end_point
 
     assert start_line <= end_line
     assert start_line != end_line or start_char <= end_char
 
-    source_area     = source_lines[start_line:end_line + 1]
-    
     if start_line == end_line:
-        return source_area[0][start_char:end_char]
-    else:
-        source_area[0]  = source_area[0][start_char:]
-        source_area[-1] = source_area[-1][:end_char]
-        return "\n".join(source_area)
+        return source_lines[start_line][start_char:end_char]
+
+    source_area     = source_lines[start_line:end_line + 1]
+    source_area[0]  = source_area[0][start_char:]
+    source_area[-1] = source_area[-1][:end_char]
+    return "\n".join(source_area)
 
 
 # Auto Load Languages --------------------------------------------------
@@ -189,13 +331,9 @@ def _path_to_local():
     global PATH_TO_LOCALCACHE
     
     if PATH_TO_LOCALCACHE is None:
-        current_path = os.path.abspath(__file__)
-        
-        while os.path.basename(current_path) != "code_ast":
-            current_path = os.path.dirname(current_path)
-        
-        current_path = os.path.dirname(current_path) # Top dir
-        PATH_TO_LOCALCACHE = os.path.join(current_path, "build")
+        package_path = os.path.dirname(os.path.abspath(__file__)) # code_ast
+        top_path     = os.path.dirname(package_path)
+        PATH_TO_LOCALCACHE = os.path.join(top_path, "build")
         
     return PATH_TO_LOCALCACHE
 
@@ -222,7 +360,12 @@ def _lang_to_fnname(lang):
 # Auto Clone from Github --------------------------------
     
 def _exists_url(url):
-    req = requests.get(url)
+    try:
+        import requests
+    except ImportError:
+        raise ValueError("To autoload a parsing definition, requests needs to be installed (pip install requests)!")
+
+    req = requests.head(url, allow_redirects = True, timeout = 10)
     return req.status_code == 200
 
 
@@ -235,11 +378,19 @@ def _clone_parse_def_from_github(lang, cache_path):
         raise ValueError("There is no parsing def for language %s available." % lang)
 
     logger.warning("Start cloning the parser definition from Github.")
-    try:  
-        Repo.clone_from(REPO_URL, cache_path)
+    try:
+        from git import Repo
+    except ModuleNotFoundError:
+        raise ValueError("To autoload a parsing definition, GitPython needs to be installed (pip install GitPython)!")
     except Exception:
+        # GitPython fails on import if git is not installed
         raise ValueError("To autoload a parsing definition, git needs to be installed on the system!")
 
+    try:
+        Repo.clone_from(REPO_URL, cache_path, depth = 1, single_branch = True)
+    except Exception as e:
+        raise ValueError("Cannot clone the parsing definition from %s: %s" % (REPO_URL, e))
+
 
 
 
@@ -2,7 +2,7 @@ from typing import Any, List
 from dataclasses import dataclass
 
 from .visitor import ASTVisitor
-from .parsers import match_span
+from .parsers import match_span, _LazyLines
 
 
 class ASTTransformer(ASTVisitor):
@@ -10,7 +10,8 @@ class ASTTransformer(ASTVisitor):
     def __init__(self):
         super().__init__()
         self.code_lines    = None
-        self._edit_trees       = []
+        self._edit_trees       = [] # None for subtrees without edits
+        self._unchanged_node   = None
 
     # Code processing functions --------------------------------
 
@@ -22,7 +23,12 @@ class ASTTransformer(ASTVisitor):
 
     def edit(self):
         assert len(self._edit_trees) == 1, "Something went wrong during parsing"
-        return self._edit_trees[0]
+        edit_tree = self._edit_trees[0]
+
+        if edit_tree is None: # Nothing changed
+            edit_tree = EditTree(self._unchanged_node)
+
+        return edit_tree
 
     def on_leave(self, original_node):
         node_update = super().on_leave(original_node)
@@ -30,29 +36,64 @@ class ASTTransformer(ASTVisitor):
         if isinstance(node_update, str):
             node_update = TextUpdate(node_update)
 
-        num_children = original_node.child_count
-        child_trees  = [self._edit_trees.pop(-1) for _ in range(num_children)][::-1]
+        if not isinstance(node_update, EditUpdate):
+            node_update = None
 
-        if node_update is None or not isinstance(node_update, EditUpdate):
-            self._edit_trees.append(EditTree(original_node, None, child_trees))
+        num_children = original_node.child_count
+        if num_children > 0:
+            child_trees = self._edit_trees[-num_children:]
+            del self._edit_trees[-num_children:]
+        else:
+            child_trees = []
+
+        has_child_edits = any(c is not None for c in child_trees)
+
+        # Edit trees are only created for subtrees that contain edits
+        if node_update is None and not has_child_edits:
+            self._unchanged_node = original_node
+            self._edit_trees.append(None)
             return
 
-        self._edit_trees.append(EditTree(original_node, node_update, child_trees))
+        children = []
+        if has_child_edits:
+            for i, child_tree in enumerate(child_trees):
+                if child_tree is None:
+                    # Unchanged children are only needed before an edit or at the end (see EditTree)
+                    if i + 1 < num_children and child_trees[i + 1] is None: continue
+                    child_tree = EditTree(original_node.child(i))
+                children.append(child_tree)
+
+        self._edit_trees.append(EditTree(original_node, node_update, children))
 
 
 # Minimal edit tree ------------------------------------------------------------
 
 class EditTree:
 
+    __slots__ = ("source_node", "target_edit", "children")
+
     def __init__(self, source_node, target_edit = None, children = []):
         self.source_node = source_node
         self.target_edit = target_edit
-        self.children    = children
+        self.children    = EditChildren()
+
+        # An unchanged child only determines up to where the original code
+        # is copied. This matters only right before an edit and at the end.
+        has_edits   = False
+        before_edit = True
+        for c in reversed(children):
+            if c.target_edit is None: 
+                c.children = []
+                if before_edit: self.children.append(c)
+                before_edit = False
+            else:
+                self.children.append(c)
+                has_edits   = True
+                before_edit = True
 
-        for c in children:
-            if c.target_edit is None: c.children = []
+        self.children.reverse()
 
-        if target_edit is None and any(c.target_edit is not None for c in self.children):
+        if target_edit is None and has_edits:
             self.target_edit = SubtreeUpdate()
 
     def apply(self, code_lines):
@@ -61,11 +102,36 @@ class EditTree:
     def __repr__(self):
         return "\n".join(_edit_to_str(self))
 
+
+class EditChildren(list):
+    """List of child edit trees that can be searched by source node"""
+
+    __slots__ = ("_edits_by_node",)
+
+    def find(self, source_node):
+        """Returns the edited child for the given source node (or None)"""
+        try:
+            edits_by_node = self._edits_by_node
+        except AttributeError:
+            edits_by_node = self._edits_by_node = {
+                c.source_node.id: c for c in self if c.target_edit is not None
+            }
+
+        sub_edit = edits_by_node.get(source_node.id)
+        if sub_edit is not None and sub_edit.source_node == source_node:
+            return sub_edit
+
 # Edit operations ----------------------------------------------------------------
 
+# Type tags of edit operations (cheaper to compare than type names)
+EDIT_UPDATE, SUBTREE_UPDATE, TEXT_UPDATE, NODE_UPDATE, TREE_UPDATE, FORMATTED_UPDATE = range(6)
+
+
 @dataclass
 class EditUpdate:
-    
+    __slots__ = ()
+    TYPE = EDIT_UPDATE
+
     def compile(self, sub_edits = None, code_lines = None):
         return ""
 
@@ -76,11 +142,15 @@ class EditUpdate:
 
 @dataclass
 class SubtreeUpdate(EditUpdate):
-    pass
+    __slots__ = ()
+    TYPE = SUBTREE_UPDATE
 
 
 @dataclass
 class TextUpdate(EditUpdate):
+    __slots__ = ("text",)
+    TYPE = TEXT_UPDATE
+
     text : str
 
     def compile(self, sub_edits = None, code_lines = None):
@@ -88,6 +158,9 @@ class TextUpdate(EditUpdate):
 
 @dataclass
 class NodeUpdate(EditUpdate):
+    __slots__ = ("node",)
+    TYPE = NODE_UPDATE
+
     node : Any
 
     def compile(self, sub_edits = None, code_lines = None):
@@ -96,22 +169,32 @@ class NodeUpdate(EditUpdate):
 
 @dataclass
 class TreeUpdate(EditUpdate):
+    __slots__ = ("node",)
+    TYPE = TREE_UPDATE
+
     node : Any
 
     def compile(self, sub_edits = None, code_lines = None):
         
-        for sub_edit in sub_edits:
-            if sub_edit.target_edit is None: continue
-            if sub_edit.source_node == self.node:
-                return sub_edit.target_edit.compile(
-                    sub_edit.children, code_lines
-                )
+        if isinstance(sub_edits, EditChildren):
+            sub_edit = sub_edits.find(self.node)
+        else:
+            sub_edit = next((c for c in sub_edits 
+                                if c.target_edit is not None and c.source_node == self.node), None)
+
+        if sub_edit is not None:
+            return sub_edit.target_edit.compile(
+                sub_edit.children, code_lines
+            )
 
         return match_span(self.node, code_lines)
 
 
 @dataclass
 class FormattedUpdate(EditUpdate):
+    __slots__ = ("format_str", "args")
+    TYPE = FORMATTED_UPDATE
+
     format_str : str
     args       : List[EditUpdate]
 
@@ -125,22 +208,26 @@ class FormattedUpdate(EditUpdate):
 
 def _serialize_tree(edit_tree):
     source = edit_tree.source_node
-    if edit_tree.target_edit.type == "SubtreeUpdate":
+    if edit_tree.target_edit.TYPE == SUBTREE_UPDATE:
         return f"{source.type} [{source.start_point[0]}, {source.start_point[1]}] - [{source.end_point[0]}, {source.end_point[1]}]"
 
     return f"{source.type} -> {edit_tree.target_edit.type} [{source.start_point[0]}, {source.start_point[1]}] - [{source.end_point[0]}, {source.end_point[1]}]"
 
 
-def _edit_to_str(edit_tree, indent = 0):
+def _edit_to_str(edit_tree):
     str_lines = []
-    if edit_tree.target_edit is None: return []
+    stack     = [(edit_tree, 0)]
+
+    while len(stack) > 0:
+        current_tree, indent = stack.pop(-1)
+        if current_tree.target_edit is None: continue
 
-    str_lines.append(
-        "    " * indent + _serialize_tree(edit_tree)
-    )
-    str_lines.extend([l for c in edit_tree.children for l in _edit_to_str(c, indent = indent + 1)])
+        str_lines.append(
+            "    " * indent + _serialize_tree(current_tree)
+        )
+        stack.extend((c, indent + 1) for c in reversed(current_tree.children))
 
-    return  str_lines
+    return str_lines
 
 
 
@@ -149,41 +236,28 @@ def _edit_to_str(edit_tree, indent = 0):
 class EditExecutor:
 
     def __init__(self, edit_tree, code_lines):
-        self.code_lines = code_lines
+        self.code_lines = _LazyLines.from_lines(code_lines)
 
-        self._edit_stack   = [edit_tree]
-        self._target_lines = []
+        # Unchanged code is copied as zero-copy views into the source buffer
+        self._source_view  = memoryview(self.code_lines.source_bytes)
 
-        # Cursors
-        self._cursor       = (0, 0)
-        self._delay_move   = (0, 0)
+        self._edit_stack    = [edit_tree]
+        self._target_chunks = []
 
-    def _move_cursor(self, position):
-        assert position >= self._cursor
+        # Cursors (byte offsets into the source code)
+        self._cursor       = 0
+        self._delay_move   = 0
 
-        while self._cursor[0] < position[0]:
-            if self._cursor[1] == 0:
-                self._target_lines.append(self.code_lines[self._cursor[0]])
-            else:
-                add_part = self.code_lines[self._cursor[0]][self._cursor[1]:]
-                self._target_lines.append(add_part)
-            
-            self._target_lines.append("\n")
-            self._cursor = (self._cursor[0] + 1, 0)
-
-        if self._cursor[1] < position[1]:
-            add_part = self.code_lines[self._cursor[0]][self._cursor[1]:position[1]]
-            self._target_lines.append(add_part)
-            self._cursor = (self._cursor[0], position[1])
+    def _move_cursor(self, position):
+        # Copy the original code inbetween cursor and position in one slice
+        if self._cursor < position:
+            self._target_chunks.append(self._source_view[self._cursor:position])
 
-    def _delay_cursor(self, position):
-        assert position >= self._cursor
-        self._delay_move = position
+        self._cursor = position
 
     def _execute_noop(self, edit_tree):
-        node     = edit_tree.source_node
-        node_end = node.end_point
-        self._delay_cursor(node_end)
+        # Unchanged code is only copied when the next edit (or the end) is reached
+        self._delay_move = edit_tree.source_node.end_byte
 
     def _execute(self, edit_tree):
 
@@ -191,7 +265,7 @@ class EditExecutor:
             self._execute_noop(edit_tree)
             return
         
-        if edit_tree.target_edit.type == "SubtreeUpdate":
+        if edit_tree.target_edit.TYPE == SUBTREE_UPDATE:
             self._edit_stack.extend(edit_tree.children[::-1])
             return
 
@@ -199,21 +273,24 @@ class EditExecutor:
             self._move_cursor(self._delay_move)
             self._delay_move = self._cursor
 
-        self._cursor = edit_tree.source_node.end_point
-        self._target_lines.append(
+        self._cursor = edit_tree.source_node.end_byte
+        self._target_chunks.append(
                 edit_tree.target_edit.compile(
                     edit_tree.children, 
                     self.code_lines
-                )
+                ).encode("utf-8")
         )
 
     def walk(self):
         
-        while len(self._edit_stack) > 0:
-            self._execute(self._edit_stack.pop(-1))
+        edit_stack = self._edit_stack
+        execute    = self._execute
+
+        while edit_stack:
+            execute(edit_stack.pop(-1))
 
         if self._delay_move >= self._cursor:
             self._move_cursor(self._delay_move)
             self._delay_move = self._cursor
 
-        return "".join(self._target_lines)
\ No newline at end of file
+        return b"".join(self._target_chunks).decode("utf-8")
\ No newline at end of file
@@ -4,8 +4,16 @@ AST Visitors
 Can be directly executed on AST structures
 """
 
+# Kind id used by tree-sitter for ERROR nodes (ts_builtin_sym_error)
+ERROR_KIND_ID = 0xFFFF
+
+
 class ASTVisitor:
 
+    # Handlers by node type (bound for the duration of a walk; see _bind_handlers)
+    _visit_handlers = None
+    _leave_handlers = None
+
     # Decreased version of visit (no edges are supported) -----------------------
 
     def visit(self, node):
@@ -26,42 +34,164 @@ class ASTVisitor:
     # Internal methods ---------------------------------------------------------
 
     def on_visit(self, node):
-        visitor_fn = getattr(self, "visit_%s" % node.type, self.visit)
+        visit_handlers = self._visit_handlers
+        if visit_handlers is None:
+            visitor_fn = getattr(self, "visit_" + node.type, None)
+        else:
+            visitor_fn = visit_handlers.get(node.type)
+
+        if visitor_fn is None: return self.visit(node) is not False
         return visitor_fn(node) is not False
 
     def on_leave(self, node):
-        leave_fn = getattr(self, "leave_%s" % node.type, self.leave)
+        leave_handlers = self._leave_handlers
+        if leave_handlers is None:
+            leave_fn = getattr(self, "leave_" + node.type, None)
+        else:
+            leave_fn = leave_handlers.get(node.type)
+
+        if leave_fn is None: return self.leave(node)
         return leave_fn(node)
 
     # Navigation ----------------------------------------------------------------
 
-    def walk(self, root_node):
+    def walk(self, root_node, language = None):
         if root_node is None: return
+
+        # If the language is known, nodes without specific handler are skipped
+        kind_ids = self._bind_handlers(language)
         
         cursor   = root_node.walk()
+
+        goto_first_child  = cursor.goto_first_child
+        goto_next_sibling = cursor.goto_next_sibling
+        goto_parent       = cursor.goto_parent
+        on_visit, on_leave = self.on_visit, self.on_leave
+
+        # Ancestors of the current node (avoids reading the cursor node on the way up)
+        parents  = []
         has_next = True
 
-        while has_next:
-            current_node = cursor.node
-            # Step 1: Try to go to next child if we continue the subtree
-            if self.on_visit(current_node):
-                has_next = cursor.goto_first_child()
-            else:
-                has_next = False
+        try:
+            while has_next:
+                current_node = cursor.node
+                handled      = kind_ids is None or current_node.kind_id in kind_ids
+
+                # Step 1: Try to go to next child if we continue the subtree
+                if (not handled or on_visit(current_node)) and goto_first_child():
+                    parents.append((current_node, handled))
+                    continue
+
+                # Step 2: Try to go to next sibling
+                if handled: on_leave(current_node)
+                has_next = goto_next_sibling()
+
+                # Step 3: Go up until sibling exists
+                while not has_next and goto_parent():
+                    parent_node, parent_handled = parents.pop(-1)
+                    if parent_handled: on_leave(parent_node) # We will never return back to this specific parent
+                    has_next = goto_next_sibling()
+        finally:
+            self._visit_handlers = self._leave_handlers = None
+
+    def _bind_handlers(self, language):
+        """
+        Binds the visit_ / leave_ functions of this visitor by node type
+        and computes the node kinds (ids) that have a specific visit or leave function.
+
+        Returns None if every node has to be handled, e.g. since the language
+        is unknown or the generic visit / leave functions are overridden.
+        """
+        handlers    = _class_handlers(type(self))
+        visit_names = handlers.visit_names
+        leave_names = handlers.leave_names
+        node_types  = handlers.node_types
+        generic     = handlers.generic
+
+        # Handlers set on the instance extend the handlers of the class
+        instance_dict = getattr(self, "__dict__", None)
+        if instance_dict:
+            instance_types = []
+            for name in instance_dict:
+                prefix = name[:6]
+                if prefix == "visit_":
+                    visit_names = visit_names + ((name[6:], name),)
+                    instance_types.append(name[6:])
+                elif prefix == "leave_":
+                    leave_names = leave_names + ((name[6:], name),)
+                    instance_types.append(name[6:])
+                elif name in _GENERIC_FNS:
+                    generic = True
+
+            if instance_types: node_types = node_types.union(instance_types)
 
-            # Step 2: Try to go to next sibling
-            if not has_next:
-                self.on_leave(current_node)
-                has_next = cursor.goto_next_sibling()
+        self._visit_handlers = {node_type: getattr(self, name) for node_type, name in visit_names}
+        self._leave_handlers = {node_type: getattr(self, name) for node_type, name in leave_names}
 
-            # Step 3: Go up until sibling exists
-            while not has_next and cursor.goto_parent():
-                self.on_leave(cursor.node) # We will never return back to this specific parent
-                has_next = cursor.goto_next_sibling()
+        if language is None or generic: return None
+        return handlers.handled_kind_ids(language, node_types)
 
-                
-    def __call__(self, root_node):
-        return self.walk(root_node)
+    def __call__(self, root_node, language = None):
+        # Overridden walk functions might not support the language
+        if language is None or type(self).walk is not ASTVisitor.walk:
+            return self.walk(root_node)
+        return self.walk(root_node, language = language)
+
+
+# Handler lookup ----------------------------------------------------------------
+
+_GENERIC_FNS = ("visit", "leave", "on_visit", "on_leave")
+
+
+class _ClassHandlers:
+    """Handlers of a visitor class (collected once per class on its first walk)"""
+
+    __slots__ = ("generic", "visit_names", "leave_names", "node_types", "kind_ids")
+
+    def __init__(self, visitor_type):
+        # Overridden generic functions have to see every node
+        self.generic = any(
+            getattr(visitor_type, generic_fn) is not getattr(ASTVisitor, generic_fn)
+            for generic_fn in _GENERIC_FNS
+        )
+
+        # (node type, function name) of all specific handlers
+        names = dir(visitor_type)
+        self.visit_names = tuple((name[len("visit_"):], name) for name in names if name.startswith("visit_"))
+        self.leave_names = tuple((name[len("leave_"):], name) for name in names if name.startswith("leave_"))
+
+        self.node_types = frozenset(
+            node_type for node_type, _ in self.visit_names + self.leave_names
+        )
+
+        # Cache: (language, handled node types) -> kind ids
+        self.kind_ids = {}
+
+    def handled_kind_ids(self, language, node_types):
+        try:
+            return self.kind_ids[(language, node_types)]
+        except KeyError:
+            pass
+
+        kind_ids = set(
+            kind_id for kind_id in range(language.node_kind_count)
+            if language.node_kind_for_id(kind_id) in node_types
+        )
+
+        # Errors are not part of the language definition
+        if "ERROR" in node_types: kind_ids.add(ERROR_KIND_ID)
+
+        kind_ids = frozenset(kind_ids)
+        self.kind_ids[(language, node_types)] = kind_ids
+        return kind_ids
+
+
+def _class_handlers(visitor_type):
+    handlers = visitor_type.__dict__.get("_class_handlers")
+    if handlers is None:
+        handlers = _ClassHandlers(visitor_type)
+        visitor_type._class_handlers = handlers
+    return handlers
 
 
 # Compositions ----------------------------------------------------------------
@@ -99,6 +229,7 @@ class ResumingVisitorComposition(ASTVisitor):
         self.visitors = visitors
 
         self.__active_visitors = [True] * len(visitors)
+        self.__num_active      = len(visitors)
         self.__resume_on       = {}
     
     def on_visit(self, node):
@@ -108,8 +239,12 @@ class ResumingVisitorComposition(ASTVisitor):
             if base_visitor.on_visit(node) is False:
                 self.__active_visitors[pos] = False
                 self.__resume_on[pos] = node
+                self.__num_active -= 1
+
+                # All other visitors are inactive already
+                if self.__num_active == 0: break
 
-        return any(self.__active_visitors)
+        return self.__num_active > 0
 
     
     def on_leave(self, node):
@@ -118,6 +253,7 @@ class ResumingVisitorComposition(ASTVisitor):
                 resume_node = self.__resume_on[pos]
                 if resume_node == node:
                     self.__active_visitors[pos] = True
+                    self.__num_active += 1
                 else:
                     continue
             
@@ -1,7 +1,8 @@
 from unittest import TestCase
 
-from code_ast import ast, ASTParser, ASTVisitor, ASTTransformer
+from code_ast import ast, ast_many, parse_many, ASTParser, ASTVisitor, ASTTransformer
 
+from code_ast.ast import REPR_MAX_BYTES
 from code_ast.transformer import FormattedUpdate, TreeUpdate
 
 # Prepare parser
@@ -58,6 +59,115 @@ class TestPythonParser(TestCase):
             code_ast.match(current_node), "bar"
         )
 
+    def test_match_bytes(self):
+        code_ast = ast(b"def foo():\n    bar()", lang = "python")
+
+        current_node = code_ast.root_node().children[0]
+        self.assertEqual(
+            code_ast.match(current_node.children[1]), "foo"
+        )
+
+    def test_match_unicode(self):
+        code_ast = ast("x = 'ä' + y", lang = "python")
+
+        current_node = code_ast.root_node().children[0].children[0]
+        self.assertEqual(current_node.type, "assignment")
+        self.assertEqual(
+            code_ast.match(current_node.children[2]), "'ä' + y"
+        )
+
+    def test_code(self):
+        source_code = "def foo():\n    bar()\n"
+        code_ast = ast(source_code, lang = "python")
+        self.assertEqual(code_ast.code(), source_code)
+
+    def test_repr(self):
+        code_ast = ast("def foo():\n    bar()\n", lang = "python")
+        self.assertEqual(
+            repr(code_ast).splitlines()[:3],
+            [
+                "PythonCodeAST [0, 0] - [2, 0]",
+                "    module [0, 0] - [2, 0]",
+                "        function_definition [0, 0] - [1, 9]",
+            ]
+        )
+
+        code_ast = ast("x = 1\n" * (REPR_MAX_BYTES // 6 + 1), lang = "python")
+        self.assertEqual(
+            repr(code_ast),
+            "PythonCodeAST [0, 0] - [%d, 0]\n    <truncated>" % (REPR_MAX_BYTES // 6 + 1)
+        )
+
+    def test_ast_many(self):
+        snippets  = ["def foo():\n    bar()", "x = 1", "foo(x)"] * 4
+        code_asts = list(ast_many(snippets, lang = "python", workers = 2))
+
+        self.assertEqual(len(code_asts), len(snippets))
+        for snippet, code_ast in zip(snippets, code_asts):
+            self.assertEqual(code_ast.code(), snippet)
+            self.assertEqual(code_ast.root_node().type, "module")
+
+        with self.assertRaises(ValueError):
+            ast_many(snippets, lang = "guess")
+
+    def test_parse_many(self):
+        source_codes = ["x = 1", b"foo(x)", "def foo():\n    bar()"]
+        results      = list(parse_many("python", source_codes, workers = 2))
+
+        self.assertEqual(len(results), len(source_codes))
+        for tree, source_lines in results:
+            self.assertEqual(tree.root_node.type, "module")
+        
+        self.assertEqual(list(results[2][1]), ["def foo():", "    bar()"])
+
+    def test_parse_many_lazy(self):
+        consumed = []
+
+        def source_codes():
+            for i in range(100):
+                consumed.append(i)
+                yield "x = %d" % i
+
+        results = parse_many("python", source_codes(), workers = 2)
+        next(results)
+        self.assertLessEqual(len(consumed), 5)
+
+        self.assertEqual(len(list(results)), 99)
+
+    def test_parser_instances(self):
+        parser, other_parser = ASTParser("python"), ASTParser("python")
+        self.assertIs(parser.lang, other_parser.lang)
+        self.assertIsNot(parser.parser, other_parser.parser)
+
+    def test_lang_detect(self):
+        code_ast = ast("def foo():\n    bar()")
+        self.assertEqual(code_ast.config.lang, "python")
+
+        code_ast = ast("#!/usr/bin/env python\nfoo()")
+        self.assertEqual(code_ast.config.lang, "python")
+
+        code_ast = ast("def foo():\n    '''function bar'''\n    bar()")
+        self.assertEqual(code_ast.config.lang, "python")
+
+        code_ast = ast("package foo\n\nfunc main() {}")
+        self.assertEqual(code_ast.config.lang, "go")
+
+        code_ast = ast("package foo;\n\npublic class Main {}")
+        self.assertEqual(code_ast.config.lang, "java")
+
+        with self.assertRaises(ValueError):
+            ast("foo()")
+
+        with self.assertRaises(ValueError):
+            ast("const int x = 1;")
+
+    def test_syntax_error(self):
+        with self.assertRaises(SyntaxError):
+            ast("def foo(:\n    x =", lang = "python")
+
+        code_ast = ast("def foo(:\n    x =", lang = "python", syntax_error = "ignore")
+        self.assertTrue(code_ast.root_node().has_error)
+
 
 # Test visitors ------------------------------------------------------------------------------------
 
@@ -94,6 +204,78 @@ class TestVisitor(TestCase):
         code_ast.visit(counter)
         self.assertEqual(counter.count, 5)
 
+    def test_nested_functions(self):
+        code_ast = ast("def foo():\n    def bar():\n        pass\n    return bar\ndef baz():\n    pass", lang = "python")
+
+        class DepthCounter(ASTVisitor):
+
+            def __init__(self):
+                self.depth     = 0
+                self.max_depth = 0
+                self.count     = 0
+            
+            def visit_function_definition(self, node):
+                self.depth += 1
+                self.count += 1
+                self.max_depth = max(self.depth, self.max_depth)
+
+            def leave_function_definition(self, node):
+                self.depth -= 1
+        
+        counter = DepthCounter()
+        code_ast.visit(counter)
+        self.assertEqual(counter.count, 3)
+        self.assertEqual(counter.max_depth, 2)
+        self.assertEqual(counter.depth, 0)
+
+    def test_instance_handlers(self):
+        code_ast = ast("x = y", lang = "python")
+
+        class IdCounter(ASTVisitor):
+
+            def __init__(self):
+                self.count = 0
+                self.visit_identifier = self.count_identifier
+
+            def count_identifier(self, node):
+                self.count += 1
+
+        counter = IdCounter()
+        code_ast.visit(counter)
+        self.assertEqual(counter.count, 2)
+
+    def test_static_handlers(self):
+        code_ast = ast("x = y", lang = "python")
+
+        class IdCollector(ASTVisitor):
+            visited = []
+
+            @staticmethod
+            def visit_identifier(node):
+                IdCollector.visited.append(node.type)
+
+            @classmethod
+            def leave_identifier(cls, node):
+                cls.visited.append("leave")
+
+        code_ast.visit(IdCollector())
+        self.assertEqual(IdCollector.visited, ["identifier", "leave"] * 2)
+
+    def test_custom_walk(self):
+        code_ast = ast("def foo():\n    bar()", lang = "python")
+
+        class RootVisitor(ASTVisitor):
+
+            def __init__(self):
+                self.root_type = None
+
+            def walk(self, root_node):
+                self.root_type = root_node.root_node.type
+
+        visitor = RootVisitor()
+        code_ast.visit(visitor)
+        self.assertEqual(visitor.root_type, "module")
+
 
 # Test transforms ----------------------------------------------------------------------------------
 
@@ -131,5 +313,30 @@ class TestTransformer(TestCase):
         transformed_code = mirror_transformer.code()
         self.assertEqual(transformed_code, "def foo(x, y):\n return y + x")
 
+    def test_transform_unicode(self):
+        code_ast = ast("x = 'ä' + y", lang = "python")
+
+        class MirrorAddTransformer(ASTTransformer):
+            def leave_binary_operator(self, node):
+                return FormattedUpdate(
+                    " %s + %s",
+                    [
+                        TreeUpdate(node.children[2]),
+                        TreeUpdate(node.children[0])
+                    ]
+                )
+
+        mirror_transformer = MirrorAddTransformer()
+        code_ast.visit(mirror_transformer)
+
+        self.assertEqual(mirror_transformer.code(), "x = y + 'ä'")
+
+    def test_transform_noop(self):
+        source_code = "def foo(x, y):\n return x + y\n"
+        code_ast = ast(source_code, lang = "python")
 
+        transformer = ASTTransformer()
+        code_ast.visit(transformer)
 
+        self.assertTrue(transformer.edit().target_edit is None)
+        self.assertEqual(transformer.code(), source_code)